@@ -33,9 +33,11 @@ Author: Itcor - https://github.com/TheItcor
 import os
 import sys
 import time
-import shutil
-import subprocess
-import tempfile
+import array
+import codecs
+import io
+import signal
+from collections import deque, namedtuple
 from typing import List, Tuple
 
 IS_POSIX = os.name == 'posix'
@@ -53,50 +55,348 @@ try:
 except Exception:
     USE_CURSES = False
 
+termios = None
 if not USE_CURSES:
     # Windows fallback input utilities
     try:
         import msvcrt
     except Exception:
         msvcrt = None
+    # POSIX fallback input utilities (raw tty mode)
+    if IS_POSIX:
+        try:
+            import select
+            import termios
+            import tty
+        except Exception:
+            termios = None
 
 # --- Editor data structures ---
+# One undo/redo record describing an edit at line `cy`, column `cx`:
+#   'insert' - `text` was inserted at cx        'delete' - `text` was removed from cx
+#   'join'   - lines cy-1 and cy were joined, the seam is at column cx of line cy-1
+#   'split'  - line cy was split at column cx   'lines'  - `text` is the previous list of lines
+# cx_before/cy_before is the cursor position to restore.
+UndoOp = namedtuple('UndoOp', 'kind cy cx text cx_before cy_before')
+
+# GapLine stores characters in an array so that building a str from it is a
+# single copy. 'w' (Python 3.13+) and 'u' on most platforms hold one code point
+# per item; where 'u' is 16 bits wide, code points are stored as UTF-32 units.
+if 'w' in array.typecodes:
+    _CHAR_TYPECODE = 'w'
+elif array.array('u').itemsize == 4:
+    _CHAR_TYPECODE = 'u'
+else:
+    _CHAR_TYPECODE = None
+
+if _CHAR_TYPECODE is not None:
+    def _to_chars(text: str) -> array.array:
+        return array.array(_CHAR_TYPECODE, text)
+
+    _from_chars = array.array.tounicode
+else:
+    _UTF32 = 'utf-32-le' if sys.byteorder == 'little' else 'utf-32-be'
+
+    def _to_chars(text: str) -> array.array:
+        chars = array.array('I')
+        chars.frombytes(text.encode(_UTF32))
+        return chars
+
+    def _from_chars(chars: array.array) -> str:
+        return chars.tobytes().decode(_UTF32)
+
+_GAP_SIZE = 16  # minimum number of free slots opened in a GapLine gap
+_GAP_MIN_LEN = 256  # lines shorter than this are edited as plain strs
+_COALESCE_WINDOW = 1.0  # seconds within which adjacent insertions share one undo step
+_IO_BUFFER_SIZE = 1 << 20  # buffer size for file loads/saves
+_MMAP_THRESHOLD = 100 << 20  # files larger than this are memory-mapped when loaded
+
+def _iter_file_lines(f):
+    """Yield the lines of binary file f without line endings, one at a time.
+
+    Like the text-mode reads this replaced, '\n', '\r\n' and a lone '\r' all end
+    a line. Files above _MMAP_THRESHOLD are memory-mapped and scanned with find()
+    rather than read through the file buffer.
+    """
+    size = os.fstat(f.fileno()).st_size
+    if size <= _MMAP_THRESHOLD:
+        for raw in f:
+            if raw.endswith(b'\n'):
+                raw = raw[:-1]
+            if b'\r' in raw:
+                parts = raw.split(b'\r')
+                if not parts[-1]:
+                    # the line ended with '\r' or '\r\n'
+                    parts.pop()
+                yield from parts
+            else:
+                yield raw
+        return
+    # imported on first use: only files above the threshold are mapped
+    import mmap
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # next '\n' and '\r' at or after start (size if there is none), each
+        # searched for again only once start has passed it
+        start = 0
+        nl = cr = -1
+        while start < size:
+            if nl < start:
+                nl = mm.find(b'\n', start)
+                if nl < 0:
+                    nl = size
+            if cr < start:
+                cr = mm.find(b'\r', start)
+                if cr < 0:
+                    cr = size
+            if cr < nl:
+                yield mm[start:cr]
+                start = cr + 2 if cr + 1 == nl else cr + 1
+            else:
+                yield mm[start:nl]
+                start = nl + 1
+
+class GapLine:
+    """A single line of text stored as a gap buffer of characters.
+
+    The gap follows the edit position, so sequential typing and backspacing only
+    touch the edges of the gap instead of rebuilding the whole line. Lines shorter
+    than _GAP_MIN_LEN are simply kept and edited as a plain str, where rebuilding
+    is cheaper than the gap bookkeeping. The str form of a gap-backed line is
+    cached until the next mutation; slice() builds only the requested part.
+    """
+    __slots__ = ('_buf', '_gap_start', '_gap_end', '_text')
+
+    def __init__(self, text: str = ''):
+        self._buf = None  # character array with a gap, created on first edit
+        self._gap_start = 0
+        self._gap_end = 0
+        self._text = text  # cached str form, None while stale
+
+    def __len__(self):
+        if self._buf is None:
+            return len(self._text)
+        return len(self._buf) - (self._gap_end - self._gap_start)
+
+    def __str__(self):
+        if self._text is None:
+            buf = self._buf
+            self._text = _from_chars(buf[:self._gap_start]) + _from_chars(buf[self._gap_end:])
+        return self._text
+
+    def __getitem__(self, key):
+        return str(self)[key]
+
+    def slice(self, start: int, stop: int) -> str:
+        """Return str(self)[start:stop] without building the whole line."""
+        text = self._text
+        if text is not None:
+            return text[start:stop]
+        # array slices clamp to the end of the line just like str slices do
+        buf = self._buf
+        gs = self._gap_start
+        if stop <= gs:
+            return _from_chars(buf[start:stop])
+        gap = self._gap_end - gs
+        if start >= gs:
+            return _from_chars(buf[start+gap:stop+gap])
+        if gap > stop - start:
+            return _from_chars(buf[start:gs]) + _from_chars(buf[gs+gap:stop+gap])
+        # a small gap is cheaper to copy along and cut out than to join two strs around
+        chars = buf[start:stop+gap]
+        del chars[gs-start:gs-start+gap]
+        return _from_chars(chars)
+
+    def _move_gap(self, pos: int):
+        """Move the gap so it starts at character position `pos`."""
+        buf = self._buf
+        if buf is None:
+            buf = self._buf = _to_chars(self._text)
+            buf[pos:pos] = _to_chars(' ' * _GAP_SIZE)
+            self._gap_start = pos
+            self._gap_end = pos + _GAP_SIZE
+            return
+        gs, ge = self._gap_start, self._gap_end
+        if pos < gs:
+            # shift the characters in [pos, gs) to the far side of the gap
+            n = gs - pos
+            buf[ge-n:ge] = buf[pos:gs]
+            self._gap_start, self._gap_end = pos, ge - n
+        elif pos > gs:
+            # pull the characters just after the gap to its near side
+            n = pos - gs
+            buf[gs:gs+n] = buf[ge:ge+n]
+            self._gap_start, self._gap_end = pos, ge + n
+
+    def insert(self, pos: int, text: str):
+        """Insert `text` at character position `pos`."""
+        buf = self._buf
+        if buf is None:
+            line = self._text
+            if len(line) < _GAP_MIN_LEN:
+                self._text = line[:pos] + text + line[pos:]
+                return
+            self._move_gap(pos)
+            buf = self._buf
+        elif pos != self._gap_start:
+            self._move_gap(pos)
+        gs = self._gap_start
+        n = len(text)
+        if self._gap_end - gs < n:
+            # grow geometrically so long runs of typing stay amortized O(1)
+            grow = max(n, _GAP_SIZE, len(buf) // 2)
+            buf[self._gap_end:self._gap_end] = _to_chars(' ' * grow)
+            self._gap_end += grow
+        if n == 1 and _CHAR_TYPECODE is not None:
+            buf[gs] = text
+        else:
+            buf[gs:gs+n] = _to_chars(text)
+        self._gap_start = gs + n
+        self._text = None
+
+    def delete(self, pos: int, n: int = 1) -> str:
+        """Delete the `n` characters before character position `pos` and return them."""
+        buf = self._buf
+        if buf is None:
+            line = self._text
+            if len(line) < _GAP_MIN_LEN:
+                self._text = line[:pos-n] + line[pos:]
+                return line[pos-n:pos]
+            self._move_gap(pos)
+            buf = self._buf
+        elif pos != self._gap_start:
+            self._move_gap(pos)
+        gs = self._gap_start - n
+        if n == 1 and _CHAR_TYPECODE is not None:
+            removed = buf[gs]
+        else:
+            removed = _from_chars(buf[gs:gs+n])
+        self._gap_start = gs
+        self._text = None
+        return removed
+
+    def split(self, pos: int) -> 'GapLine':
+        """Truncate this line at `pos` and return the remainder as a new line."""
+        text = str(self)
+        self._buf = None
+        self._text = text[:pos]
+        return GapLine(text[pos:])
+
+
 class Buffer:
-    """A simple text buffer represented as list of lines, with undo/redo support.
+    """A simple text buffer represented as list of GapLine lines, with undo/redo support.
 
-    Undo/redo is implemented by storing snapshots of (lines, cx, cy).
+    Undo/redo is implemented by storing UndoOp delta records that only reference
+    the line(s) an edit touched.
     """
     def __init__(self, lines: List[str] = None, filename: str = None, undo_limit: int = 200):
-        self.lines = lines or ['']
+        self.lines = [GapLine(line) for line in lines] if lines else [GapLine()]
+        # cached length of every line, kept in step with self.lines by each edit
+        self._line_lens = [len(line) for line in self.lines]
         self.filename = filename
         self.cx = 0  # cursor x (col)
         self.cy = 0  # cursor y (line)
         self.changed = False
+        # directories save() has already created or found to exist
+        self._known_dirs = set()
 
-        # Undo/redo stacks hold tuples: (lines_copy, cx, cy)
-        self._undo_stack: List[Tuple[List[str], int, int]] = []
-        self._redo_stack: List[Tuple[List[str], int, int]] = []
+        # Undo/redo stacks hold UndoOp records
+        self._undo_stack: List[UndoOp] = []
+        self._redo_stack: List[UndoOp] = []
         self._undo_limit = undo_limit
 
+        # Consecutive insertions are coalesced into the undo record of the first one
+        # while they stay contiguous (ending at _coalesce_end) and close in time; the
+        # record gets the run's full text when the run ends (see _end_run). Backspacing
+        # inside the run just shortens it.
+        self._last_edit_kind = None
+        self._last_edit_time = 0.0
+        self._coalesce_end = None
+
+        # Dirty-line tracking for the renderer: single line numbers that need a
+        # repaint, plus an optional index from which every following line is dirty.
+        self._dirty = set()
+        self._dirty_from = 0
+
         # initial state is not pushed to undo stack by default
 
-    # --- Internal snapshot helpers ---
-    def _snapshot(self) -> Tuple[List[str], int, int]:
-        """Return a deep-ish copy snapshot of current state."""
-        return (list(self.lines), self.cx, self.cy)
+    @property
+    def filename(self) -> str:
+        return self._filename
 
-    def _restore_snapshot(self, snap: Tuple[List[str], int, int]):
-        """Restore from a snapshot tuple."""
-        lines, cx, cy = snap
-        self.lines = list(lines)
-        self.cx = cx
-        self.cy = cy
-        # When restoring an old snapshot, we should mark as changed (it may differ)
+    @filename.setter
+    def filename(self, value: str):
+        # the absolute path is resolved once here rather than on every save
+        self._filename = value
+        self._abs_filename = os.path.abspath(value) if value else None
+
+    @property
+    def abs_filename(self) -> str:
+        """Absolute path of the file, as resolved when its name was set (unaffected by :cd)."""
+        return self._abs_filename
+
+    # --- Internal undo helpers ---
+    def _apply(self, op: UndoOp) -> UndoOp:
+        """Revert the edit described by `op` in place and return its inverse record."""
+        lines = self.lines
+        lens = self._line_lens
+        kind, cy, cx = op.kind, op.cy, op.cx
+        if kind == 'insert':
+            # delete the inserted text again
+            n = len(op.text)
+            lines[cy].delete(cx + n, n)
+            lens[cy] -= n
+            inverse = UndoOp('delete', cy, cx, op.text, self.cx, self.cy)
+            self._dirty.add(cy)
+        elif kind == 'delete':
+            # put the removed text back
+            lines[cy].insert(cx, op.text)
+            lens[cy] += len(op.text)
+            inverse = UndoOp('insert', cy, cx, op.text, self.cx, self.cy)
+            self._dirty.add(cy)
+        elif kind == 'join':
+            # split line cy-1 at the seam again
+            lines.insert(cy, lines[cy-1].split(cx))
+            lens.insert(cy, lens[cy-1] - cx)
+            lens[cy-1] = cx
+            inverse = UndoOp('split', cy-1, cx, None, self.cx, self.cy)
+            self.mark_dirty_from(cy-1)
+        elif kind == 'split':
+            # join lines cy and cy+1 again
+            lines[cy].insert(cx, str(lines[cy+1]))
+            lens[cy] += lens[cy+1]
+            del lines[cy+1]
+            del lens[cy+1]
+            inverse = UndoOp('join', cy+1, cx, None, self.cx, self.cy)
+            self.mark_dirty_from(cy)
+        else:  # 'lines'
+            inverse = UndoOp('lines', 0, 0, lines, self.cx, self.cy)
+            self.lines = op.text
+            self._line_lens = [len(line) for line in self.lines]
+            self.mark_dirty_from(0)
+        self.cx = op.cx_before
+        self.cy = op.cy_before
+        self._last_edit_kind = None
+        # When reverting an edit, we should mark as changed (it may differ)
         self.changed = True
+        return inverse
+
+    def _end_run(self):
+        """Close the current run of coalesced insertions, storing its text in its undo record."""
+        if self._last_edit_kind == 'insert' and self._undo_stack:
+            top = self._undo_stack[-1]
+            cy, end = self._coalesce_end
+            if end == top.cx:
+                # everything typed in the run was backspaced away again
+                self._undo_stack.pop()
+            else:
+                self._undo_stack[-1] = UndoOp('insert', cy, top.cx, self.lines[cy].slice(top.cx, end),
+                                              top.cx_before, top.cy_before)
+        self._last_edit_kind = None
 
-    def _push_undo(self):
-        """Push current state to undo stack and cap its size."""
-        self._undo_stack.append(self._snapshot())
+    def _push_undo(self, kind: str, cy: int, cx: int, text=None):
+        """Push an undo record for an edit about to happen and cap the stack size."""
+        self._end_run()
+        self._undo_stack.append(UndoOp(kind, cy, cx, text, self.cx, self.cy))
         if len(self._undo_stack) > self._undo_limit:
             # drop oldest
             del self._undo_stack[0]
@@ -105,164 +405,499 @@ class Buffer:
         """Clear redo stack (should be called on any new edit)."""
         self._redo_stack.clear()
 
+    # --- Dirty-line tracking ---
+    def mark_dirty_from(self, lineno: int):
+        """Mark line `lineno` and every line after it as needing a repaint."""
+        if self._dirty_from is None or lineno < self._dirty_from:
+            self._dirty_from = lineno
+
+    def take_dirty(self, start: int, stop: int) -> List[int]:
+        """Return dirty line numbers in [start, stop) and reset dirty tracking."""
+        dirty = {n for n in self._dirty if start <= n < stop}
+        if self._dirty_from is not None:
+            dirty.update(range(max(start, self._dirty_from), stop))
+        self._dirty.clear()
+        self._dirty_from = None
+        return sorted(dirty)
+
+    def visible_slice(self, lineno: int, left: int, width: int) -> str:
+        """Return the text of line `lineno` shown in `width` columns starting at column `left`."""
+        n = self._line_lens[lineno]
+        if left >= n:
+            return ''
+        if left == 0 and n <= width:
+            # the whole line fits: hand out the cached str itself, no slice copy
+            return str(self.lines[lineno])
+        return self.lines[lineno].slice(left, left+width)
+
+    def has_dirty(self) -> bool:
+        """Return True if any line changed since the last take_dirty()."""
+        return bool(self._dirty) or self._dirty_from is not None
+
     # --- Public undo/redo operations ---
     def undo(self) -> bool:
         """Undo last operation. Returns True if undone, False if nothing to undo."""
+        self._end_run()
         if not self._undo_stack:
             return False
-        # push current state to redo, then restore last undo
-        self._redo_stack.append(self._snapshot())
-        snap = self._undo_stack.pop()
-        self._restore_snapshot(snap)
+        # revert the last edit and keep its inverse for redo
+        self._redo_stack.append(self._apply(self._undo_stack.pop()))
         return True
 
     def redo(self) -> bool:
         """Redo last undone operation. Returns True if redone, False if nothing to redo."""
+        self._end_run()
         if not self._redo_stack:
             return False
-        # push current state back to undo, then restore redo snapshot
-        self._undo_stack.append(self._snapshot())
-        snap = self._redo_stack.pop()
-        self._restore_snapshot(snap)
+        # re-apply the undone edit and keep its inverse for undo
+        self._undo_stack.append(self._apply(self._redo_stack.pop()))
         return True
 
     # --- Editing primitives (push undo before mutations) ---
     def insert_char(self, ch: str):
-        """Insert characters at current cursor position."""
-        self._push_undo()
-        self._clear_redo()
-        line = self.lines[self.cy]
-        self.lines[self.cy] = line[:self.cx] + ch + line[self.cx:]
-        self.cx += len(ch)
+        """Insert characters at current cursor position.
+
+        Insertions that continue the previous one (same line, right after it,
+        within _COALESCE_WINDOW seconds) share its undo record.
+        """
+        lines = self.lines
+        cy = self.cy
+        cx = self.cx
+        now = time.monotonic()
+        if not (self._last_edit_kind == 'insert'
+                and now - self._last_edit_time < _COALESCE_WINDOW
+                and self._coalesce_end == (cy, cx)
+                and '\n' not in ch):
+            self._push_undo('insert', cy, cx, ch)
+        # _clear_redo() inlined: this runs for every typed key
+        if self._redo_stack:
+            self._redo_stack.clear()
+        lines[cy].insert(cx, ch)
+        n = len(ch)
+        self._line_lens[cy] += n
+        cx += n
+        self.cx = cx
         self.changed = True
+        self._dirty.add(cy)
+        self._last_edit_kind = 'insert'
+        self._last_edit_time = now
+        self._coalesce_end = (cy, cx)
 
     def backspace(self):
         """Backspace: delete char before cursor or join with previous line."""
+        cy = self.cy
+        cx = self.cx
         # If nothing to delete and at start of buffer, do nothing
-        if self.cx == 0 and self.cy == 0:
+        if cx == 0 and cy == 0:
             return
-        self._push_undo()
-        self._clear_redo()
-        if self.cx > 0:
-            line = self.lines[self.cy]
-            self.lines[self.cy] = line[:self.cx-1] + line[self.cx:]
-            self.cx -= 1
+        # _clear_redo() inlined: this runs for every backspaced key
+        if self._redo_stack:
+            self._redo_stack.clear()
+        lines = self.lines
+        lens = self._line_lens
+        if cx > 0:
+            if (self._last_edit_kind == 'insert' and self._coalesce_end == (cy, cx)
+                    and self._undo_stack and cx > self._undo_stack[-1].cx):
+                # take back the last character typed in the current insertion run
+                lines[cy].delete(cx)
+                self._coalesce_end = (cy, cx - 1)
+            else:
+                # the run record must be completed before the line changes under it
+                self._end_run()
+                removed = lines[cy].delete(cx)
+                self._push_undo('delete', cy, cx - 1, removed)
+            lens[cy] -= 1
+            self.cx = cx - 1
             self.changed = True
-        elif self.cy > 0:
+            self._dirty.add(cy)
+        elif cy > 0:
             # join with previous line
-            prev = self.lines[self.cy-1]
-            cur = self.lines[self.cy]
-            new_cx = len(prev)
-            self.lines[self.cy-1] = prev + cur
-            del self.lines[self.cy]
-            self.cy -= 1
+            prev = lines[cy-1]
+            cur = lines[cy]
+            new_cx = lens[cy-1]
+            self._push_undo('join', cy, new_cx)
+            prev.insert(new_cx, str(cur))
+            del lines[cy]
+            lens[cy-1] += lens[cy]
+            del lens[cy]
+            self.cy = cy - 1
             self.cx = new_cx
             self.changed = True
+            self.mark_dirty_from(cy - 1)
 
     def newline(self):
         """Split the current line at cursor into two lines."""
-        self._push_undo()
+        lines = self.lines
+        lens = self._line_lens
+        cy = self.cy
+        cx = self.cx
+        self._push_undo('split', cy, cx)
         self._clear_redo()
-        line = self.lines[self.cy]
-        left = line[:self.cx]
-        right = line[self.cx:]
-        self.lines[self.cy] = left
-        self.lines.insert(self.cy+1, right)
-        self.cy += 1
+        lines.insert(cy+1, lines[cy].split(cx))
+        lens.insert(cy+1, lens[cy] - cx)
+        lens[cy] = cx
+        self.mark_dirty_from(cy)
+        self.cy = cy + 1
         self.cx = 0
         self.changed = True
 
     # Navigation operations do not modify buffer contents, so they don't affect undo/redo
+    # (but they do end the current run of coalesced insertions)
     def move_left(self):
+        self._end_run()
         if self.cx > 0:
             self.cx -= 1
         elif self.cy > 0:
             self.cy -= 1
-            self.cx = len(self.lines[self.cy])
+            self.cx = self._line_lens[self.cy]
 
     def move_right(self):
-        if self.cx < len(self.lines[self.cy]):
+        self._end_run()
+        if self.cx < self._line_lens[self.cy]:
             self.cx += 1
         elif self.cy < len(self.lines)-1:
             self.cy += 1
             self.cx = 0
 
     def move_up(self):
+        self._end_run()
         if self.cy > 0:
             self.cy -= 1
-            self.cx = min(self.cx, len(self.lines[self.cy]))
+            self.cx = min(self.cx, self._line_lens[self.cy])
 
     def move_down(self):
+        self._end_run()
         if self.cy < len(self.lines)-1:
             self.cy += 1
-            self.cx = min(self.cx, len(self.lines[self.cy]))
+            self.cx = min(self.cx, self._line_lens[self.cy])
 
     def load_from_file(self, filename: str):
         """Load content from file. This is treated as a new state (push previous to undo)."""
-        # push current state to undo so user can undo load
-        self._push_undo()
+        # push current lines to undo so user can undo load
+        self._push_undo('lines', 0, 0, self.lines)
         self._clear_redo()
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = f.read().splitlines()
+        # stream the file line by line instead of reading it into one string
+        with open(filename, 'rb', buffering=_IO_BUFFER_SIZE) as f:
+            data = [GapLine(raw.decode('utf-8')) for raw in _iter_file_lines(f)]
         if not data:
-            data = ['']
+            data = [GapLine()]
         self.lines = data
+        self._line_lens = [len(line) for line in data]
         self.filename = filename
         self.cx = 0
         self.cy = 0
         self.changed = False
+        self.mark_dirty_from(0)
 
     def save(self, filename: str = None):
         """Save buffer to file. Saving does not affect undo/redo stacks themselves."""
         if filename is None:
             filename = self.filename
+            path = self._abs_filename
+        else:
+            path = os.path.abspath(filename)
         if filename is None:
             raise ValueError('No filename specified')
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(os.path.abspath(filename)) or '.', exist_ok=True)
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(self.lines))
-        self.filename = filename
+        # Ensure directory exists (only checked the first time it is seen)
+        d = os.path.dirname(path)
+        if d not in self._known_dirs:
+            os.makedirs(d, exist_ok=True)
+            self._known_dirs.add(d)
+        # Stream lines into a buffered file instead of joining the whole buffer
+        # into one string first (same line endings as a text-mode write).
+        try:
+            f = open(path, 'wb', buffering=_IO_BUFFER_SIZE)
+        except FileNotFoundError:
+            # the directory was removed after it was first seen: create it again
+            self._known_dirs.discard(d)
+            os.makedirs(d, exist_ok=True)
+            self._known_dirs.add(d)
+            f = open(path, 'wb', buffering=_IO_BUFFER_SIZE)
+        with f:
+            write = f.write
+            newline = os.linesep.encode('ascii')
+            first = True
+            for line in self.lines:
+                if not first:
+                    write(newline)
+                write(str(line).encode('utf-8'))
+                first = False
+        self._filename = filename
+        self._abs_filename = path
         self.changed = False
 
 # --- Utilities ---
+_OUTPUT_CAP = 1 << 20  # max bytes of captured output kept per stream
+
+def _decode_output(data: bytes, truncated: bool) -> str:
+    text = data.decode('utf-8', 'replace').replace('\r\n', '\n')
+    if truncated:
+        text += '\n...[output truncated]'
+    return text
+
+def _truncate(text: str, cap: int) -> str:
+    """Cut text down to at most cap characters, marking the cut."""
+    if len(text) <= cap:
+        return text
+    marker = '\n...[truncated]'
+    return text[:max(cap - len(marker), 0)] + marker
 
 def run_command_and_capture(cmd: List[str], cwd: str = None, timeout: int = 10) -> Tuple[int, str, str]:
     """Run a command (list) without shell and capture stdout/stderr.
+    Output is read incrementally and each stream keeps at most _OUTPUT_CAP bytes;
+    anything beyond that is drained and discarded.
     Returns (returncode, stdout, stderr).
     """
+    # imported on first use: most sessions never run anything
+    import selectors
+    import subprocess
     try:
-        proc = subprocess.run(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout)
-        return proc.returncode, proc.stdout, proc.stderr
-    except subprocess.TimeoutExpired as e:
-        return -1, '', f'Timeout after {timeout} seconds'
+        proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     except FileNotFoundError:
         return -1, '', f'Command not found: {cmd[0]}'
+    if not IS_POSIX:
+        # pipes can't be polled with select on Windows
+        try:
+            out, err = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            return -1, '', f'Timeout after {timeout} seconds'
+        return (proc.returncode, _decode_output(out[:_OUTPUT_CAP], len(out) > _OUTPUT_CAP),
+                _decode_output(err[:_OUTPUT_CAP], len(err) > _OUTPUT_CAP))
+
+    out_fd, err_fd = proc.stdout.fileno(), proc.stderr.fileno()
+    bufs = {out_fd: bytearray(), err_fd: bytearray()}
+    truncated = set()
+    deadline = time.monotonic() + timeout
+    try:
+        with selectors.DefaultSelector() as sel:
+            sel.register(proc.stdout, selectors.EVENT_READ)
+            sel.register(proc.stderr, selectors.EVENT_READ)
+            while sel.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                for key, _ in sel.select(remaining):
+                    data = os.read(key.fd, 65536)
+                    if not data:
+                        sel.unregister(key.fileobj)
+                        continue
+                    buf = bufs[key.fd]
+                    room = _OUTPUT_CAP - len(buf)
+                    if len(data) > room:
+                        truncated.add(key.fd)
+                        data = data[:room]
+                    buf += data
+        rc = proc.wait(timeout=max(deadline - time.monotonic(), 0))
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        return -1, '', f'Timeout after {timeout} seconds'
+    finally:
+        proc.stdout.close()
+        proc.stderr.close()
+    return (rc, _decode_output(bufs[out_fd], out_fd in truncated),
+            _decode_output(bufs[err_fd], err_fd in truncated))
+
+# Compilers used by :r, by source file extension
+_COMPILERS = {'.c': 'gcc', '.cpp': 'g++', '.cc': 'g++', '.cxx': 'g++', '.rs': 'rustc'}
+# Compiled executables are kept here, named by a hash of compiler + sources
+_CACHE_HOME = os.environ.get('XDG_CACHE_HOME', '')
+if not os.path.isabs(_CACHE_HOME):
+    # the XDG spec says relative paths are to be ignored
+    _CACHE_HOME = os.path.join(os.path.expanduser('~'), '.cache')
+_BUILD_CACHE_DIR = os.path.join(_CACHE_HOME, 'rawide')
+_BUILD_CACHE_KEEP = 32  # at most this many executables are kept
+_BUILD_CACHE_MAX_AGE = 7 * 24 * 3600  # seconds an unused executable is kept
+
+def _hash_build_inputs(fname: str, compiler: str) -> Tuple[str, bool]:
+    """Return (digest, complete): a hex digest of compiler, fname and the local files
+    fname pulls in, and whether all of those files could be tracked.
+    C/C++ sources are followed through quoted #include directives, relative to the
+    including file. Rust sources are followed through `mod name;` declarations
+    (name.rs or name/mod.rs, or a #[path] attribute) and include!-style macros.
+    Editing any of these files changes the digest.
+    """
+    # imported on first use: only :r on a compiled language needs them
+    import hashlib
+    import re
+    h = hashlib.blake2b(compiler.encode('utf-8') + b'\0', digest_size=16)
+    with open(fname, 'rb') as f:
+        data = f.read()
+    h.update(data)
+    rust = compiler == 'rustc'
+    if rust:
+        mod_decl = re.compile(rb'(?:^|(?<=[{};]))[ \t]*(?:#\[path[ \t]*=[ \t]*"([^"]+)"\][ \t\r\n]*)?'
+                              rb'(?:pub(?:\([^)]*\))?[ \t]+)?mod[ \t]+(\w+)[ \t]*;', re.M)
+        include_macro = re.compile(rb'\binclude(?:_str|_bytes)?![ \t]*\([ \t]*"([^"]+)"[ \t]*\)')
+    else:
+        include = re.compile(rb'^[ \t]*#[ \t]*include[ \t]*"([^"]+)"', re.M)
+    complete = True
+    seen = {fname}
+    pending = [(fname, data)]
+    while pending:
+        path, data = pending.pop()
+        here = os.path.dirname(path)
+        # each dependency: (candidate paths, whether its own dependencies are followed)
+        deps = []
+        if rust:
+            # modules of the crate root and of mod.rs files live next to them; those
+            # of any other module file live in a directory named after it
+            stem = os.path.splitext(os.path.basename(path))[0]
+            mod_dir = here if path == fname or stem in ('main', 'lib', 'mod') else os.path.join(here, stem)
+            for m in mod_decl.finditer(data):
+                if m.group(1):
+                    deps.append(([os.path.join(here, os.fsdecode(m.group(1)))], True))
+                else:
+                    name = os.fsdecode(m.group(2))
+                    deps.append(([os.path.join(mod_dir, name + '.rs'),
+                                  os.path.join(mod_dir, name, 'mod.rs')], True))
+            for m in include_macro.finditer(data):
+                deps.append(([os.path.join(here, os.fsdecode(m.group(1)))], False))
+        else:
+            for m in include.finditer(data):
+                deps.append(([os.path.join(here, os.fsdecode(m.group(1)))], True))
+        for candidates, follow in deps:
+            dep = next((os.path.normpath(c) for c in candidates if os.path.isfile(c)), None)
+            if dep is None:
+                # a C header from the system include path is fine to leave out; a Rust
+                # module not found here (e.g. declared inside an inline module) is not
+                if rust:
+                    complete = False
+                continue
+            if dep in seen:
+                continue
+            seen.add(dep)
+            with open(dep, 'rb') as f:
+                dep_data = f.read()
+            h.update(b'\0' + os.fsencode(dep) + b'\0')
+            h.update(dep_data)
+            if follow:
+                pending.append((dep, dep_data))
+    return h.hexdigest(), complete
+
+def _prune_build_cache(keep: str):
+    """Delete cached executables unused for _BUILD_CACHE_MAX_AGE seconds and all but
+    the _BUILD_CACHE_KEEP most recently used ones. `keep` is never deleted.
+    """
+    try:
+        with os.scandir(_BUILD_CACHE_DIR) as it:
+            entries = [(e.stat().st_mtime, e.name, e.path) for e in it]
+    except OSError:
+        return
+    entries.sort(reverse=True)
+    now = time.time()
+    kept = 0
+    for mtime, name, path in entries:
+        if path == keep:
+            continue
+        if now - mtime <= _BUILD_CACHE_MAX_AGE:
+            if name.startswith('rawide_'):
+                # probably a compile still running in another session
+                continue
+            if kept < _BUILD_CACHE_KEEP - 1:
+                kept += 1
+                continue
+        try:
+            os.remove(path)
+        except Exception:
+            pass
 
 # --- Platform rendering / input abstraction for fallback ---
+_ARROW_KEYS = {'A': 'UP', 'B': 'DOWN', 'C': 'RIGHT', 'D': 'LEFT'}
+# fixed ANSI sequences, pre-encoded so they skip the text encoding layer
+_ANSI_CLEAR = b'\x1b[2J\x1b[H'
+_ANSI_HIDE = b'\x1b[?25l'
+_ANSI_SHOW = b'\x1b[?25h'
+_DUMB_OUTPUT_CAP = 64 * 1024  # characters of :r output shown by the fallback popup
+_RESIZE_POLL_KEYS = 32  # without SIGWINCH, re-read the terminal size every this many keys
+
 class DumbTerminal:
     """A minimal terminal renderer + input handler for platforms without curses.
     Uses ANSI codes to clear and position the cursor, and msvcrt for key detection on Windows.
+    On a POSIX tty, enter_raw() switches to raw mode and keys are read and decoded in batches.
+    Output is collected as bytes and sent to the terminal in one write by flush().
 
     Note: stdin.read based fallback can't reliably detect ctrl-key combos unless the terminal
     forwards them as characters. On Windows with msvcrt we can read single keys.
     """
     def __init__(self):
+        self.resize()
+        self._out = io.BytesIO()
+        self._encoding = getattr(sys.stdout, 'encoding', None) or 'utf-8'
+        # raw mode state: tty attributes to restore and decoded keys not yet returned
+        self._fd = None
+        self._saved_attrs = None
+        self._pending = deque()
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+
+    def resize(self):
+        """Re-read the terminal size."""
+        import shutil  # only needed by the fallback terminal
         self.cols, self.rows = shutil.get_terminal_size((80, 24))
 
-    def clear(self):
-        sys.stdout.write('\x1b[2J')
-        sys.stdout.write('\x1b[H')
+    def enter_raw(self):
+        """Put a POSIX tty into raw mode so keys arrive without waiting for Enter."""
+        if msvcrt or termios is None or self._saved_attrs is not None or not sys.stdin.isatty():
+            return
+        fd = sys.stdin.fileno()
+        self._saved_attrs = termios.tcgetattr(fd)
+        tty.setraw(fd)
+        # keep output post-processing so '\n' still returns the carriage
+        attrs = termios.tcgetattr(fd)
+        attrs[1] |= termios.OPOST
+        termios.tcsetattr(fd, termios.TCSADRAIN, attrs)
+        self._fd = fd
+
+    def restore(self):
+        """Restore the tty attributes saved by enter_raw()."""
+        if self._saved_attrs is not None:
+            termios.tcsetattr(self._fd, termios.TCSADRAIN, self._saved_attrs)
+            self._saved_attrs = None
+
+    def __del__(self):
+        self.restore()
+
+    def read_line(self, prompt: str = '') -> str:
+        """Read a line with the normal tty line editing, even while in raw mode."""
+        self.flush()
+        raw = self._saved_attrs is not None
+        self.restore()
+        try:
+            return input(prompt)
+        finally:
+            if raw:
+                self.enter_raw()
+
+    def write(self, text: str):
+        self._out.write(text.encode(self._encoding, 'replace'))
+
+    def flush(self):
+        """Send all buffered output to the terminal with a single write."""
+        data = self._out.getvalue()
+        # keep ordering with anything written through the text layer
         sys.stdout.flush()
+        out = getattr(sys.stdout, 'buffer', None)
+        if data:
+            if out is None:
+                sys.stdout.write(data.decode(self._encoding))
+            else:
+                out.write(data)
+            self._out = io.BytesIO()
+        (out or sys.stdout).flush()
+
+    def clear(self):
+        self._out.write(_ANSI_CLEAR)
 
     def move_cursor(self, x: int, y: int):
-        sys.stdout.write(f'\x1b[{y+1};{x+1}H')
+        self._out.write(f'\x1b[{y+1};{x+1}H'.encode('ascii'))
 
     def hide_cursor(self):
-        sys.stdout.write('\x1b[?25l')
+        self._out.write(_ANSI_HIDE)
 
     def show_cursor(self):
-        sys.stdout.write('\x1b[?25h')
+        self._out.write(_ANSI_SHOW)
 
     def get_key(self):
         # returns a tuple (type, value) where type may be 'char' or 'arrow' or 'ctrl'
@@ -278,13 +913,47 @@ class DumbTerminal:
                     return ('char', '\n')
                 # msvcrt returns control key characters too (e.g. '\x1a' for Ctrl+Z)
                 return ('char', ch)
+        elif self._saved_attrs is not None:
+            while not self._pending:
+                self._read_keys()
+            return self._pending.popleft()
         else:
             # fallback to blocking sys.stdin.read (user must press Enter) - very limited
             ch = sys.stdin.read(1)
             return ('char', ch)
 
+    def _read_keys(self):
+        """Read all bytes pending on the raw tty and queue the keys they decode to."""
+        fd = self._fd
+        data = os.read(fd, 32)  # blocks until at least one byte arrives
+        if not data:
+            self._pending.append(('char', ''))
+            return
+        # slurp the rest of a paste; wait briefly if an escape sequence was cut short
+        while select.select([fd], [], [], 0.05 if data.endswith((b'\x1b', b'\x1b[', b'\x1bO')) else 0)[0]:
+            chunk = os.read(fd, 32)
+            if not chunk:
+                break
+            data += chunk
+        text = self._decoder.decode(data)
+        i = 0
+        while i < len(text):
+            ch = text[i]
+            if ch == '\x1b' and text[i+1:i+2] in ('[', 'O') and text[i+2:i+3] in _ARROW_KEYS:
+                self._pending.append(('arrow', _ARROW_KEYS[text[i+2]]))
+                i += 3
+                continue
+            if ch == '\r':
+                ch = '\n'
+            self._pending.append(('char', ch))
+            i += 1
+
 # --- Core UI / Editor loop for curses ---
 class RawIDE:
+    # persistent mode indicators shown in the status bar
+    _MODE_CMD = 'MODE: COMMAND'
+    _MODE_EDIT = 'MODE: EDITOR'
+
     def __init__(self, stdscr=None, use_curses: bool = True):
         self.use_curses = use_curses and USE_CURSES
         self.stdscr = stdscr
@@ -299,6 +968,33 @@ class RawIDE:
             self.buffer.filename = None
         # Modes: 'command' (normal) and 'editor' (insert)
         self.mode = 'command'  # start in command (normal) mode as requested
+        # curses renderer state: the (top_line, left_col, rows, cols) last drawn,
+        # and whether the whole window must be repainted on the next draw
+        self._drawn_view = None
+        self._full_redraw = True
+        # :r build cache: absolute source path -> (content hash, executable path)
+        self._build_cache = {}
+        # DumbTerminal shared by the fallback renderer, input loop and popups
+        self._dt = None if self.use_curses else DumbTerminal()
+        # draw() is skipped until something visible changes: the flag below, an
+        # edited line or a cursor position different from the one last drawn
+        self._needs_draw = True
+        self._drawn_cursor = None
+        # status bar text and the (filename, changed, cy, cx, status) it was built from
+        self._status_key = None
+        self._status_text = ''
+        # ':' command name -> handler taking the argument list; returns False to exit
+        self._cmds = {
+            'w': self._cmd_w,
+            'wq': self._cmd_wq,
+            'q': self._cmd_q,
+            'r': self._cmd_r,
+            'open': self._cmd_open,
+            'cd': self._cmd_cd,
+            'mkdir': self._cmd_mkdir,
+            'ls': self._cmd_ls,
+            'help': self._cmd_help,
+        }
 
     # ---- High-level commands ----
     def open_file(self, filename: str):
@@ -334,56 +1030,73 @@ class RawIDE:
         except Exception as e:
             self.status_message(f'Failed to save: {e}')
             return
+        # the buffer was saved to its absolute path, which stays valid after :cd
+        fname = self.buffer.abs_filename
         # Determine how to run
         if ext in ['.py']:
             cmd = [sys.executable, fname]
             rc, out, err = run_command_and_capture(cmd, cwd=cwd, timeout=30)
             self.show_output(rc, out, err)
-        elif ext in ['.c']:
-            exe = tempfile.mktemp(prefix='rawide_', suffix='')
-            cmd_compile = ['gcc', fname, '-o', exe]
-            rc, out, err = run_command_and_capture(cmd_compile, cwd=cwd, timeout=30)
+        elif ext in _COMPILERS:
+            exe, rc, out, err = self.build(fname, _COMPILERS[ext], cwd)
             if rc != 0:
                 self.show_output(rc, out, err, compile_phase=True)
             else:
                 rc2, out2, err2 = run_command_and_capture([exe], cwd=cwd, timeout=30)
                 self.show_output(rc2, out2, err2)
-                try:
-                    os.remove(exe)
-                except Exception:
-                    pass
-        elif ext in ['.cpp', '.cc', '.cxx']:
-            exe = tempfile.mktemp(prefix='rawide_', suffix='')
-            cmd_compile = ['g++', fname, '-o', exe]
-            rc, out, err = run_command_and_capture(cmd_compile, cwd=cwd, timeout=30)
-            if rc != 0:
-                self.show_output(rc, out, err, compile_phase=True)
-            else:
-                rc2, out2, err2 = run_command_and_capture([exe], cwd=cwd, timeout=30)
-                self.show_output(rc2, out2, err2)
-                try:
-                    os.remove(exe)
-                except Exception:
-                    pass
-        elif ext in ['.rs']:
-            # try rustc
-            exe = tempfile.mktemp(prefix='rawide_', suffix='')
-            cmd_compile = ['rustc', fname, '-o', exe]
-            rc, out, err = run_command_and_capture(cmd_compile, cwd=cwd, timeout=30)
-            if rc != 0:
-                self.show_output(rc, out, err, compile_phase=True)
-            else:
-                rc2, out2, err2 = run_command_and_capture([exe], cwd=cwd, timeout=30)
-                self.show_output(rc2, out2, err2)
-                try:
-                    os.remove(exe)
-                except Exception:
-                    pass
         else:
             self.status_message(f'Run/compile not supported for {ext}')
 
+    def build(self, fname: str, compiler: str, cwd: str) -> Tuple[str, int, str, str]:
+        """Compile fname (an absolute path) with compiler, reusing the cached executable if
+        none of its sources changed. Sources that can't all be tracked are always rebuilt.
+        Returns (exe_path, returncode, stdout, stderr).
+        """
+        # imported on first use: only :r on a compiled language needs it
+        import tempfile
+        digest, complete = _hash_build_inputs(fname, compiler)
+        exe = os.path.join(_BUILD_CACHE_DIR, digest + ('' if IS_POSIX else '.exe'))
+        old = self._build_cache.get(fname)
+        if old is not None and old[0] != digest:
+            # the source changed; its previous executable will not be used again
+            try:
+                os.remove(old[1])
+            except Exception:
+                pass
+        self._build_cache[fname] = (digest, exe)
+        if complete and os.path.exists(exe):
+            try:
+                # mark it as recently used so pruning keeps it
+                os.utime(exe)
+            except Exception:
+                pass
+            return exe, 0, '', ''
+        # compile into a private temp file and move it into place only on success
+        os.makedirs(_BUILD_CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix='rawide_', dir=_BUILD_CACHE_DIR)
+        os.close(fd)
+        rc, out, err = run_command_and_capture([compiler, fname, '-o', tmp], cwd=cwd, timeout=30)
+        if rc == 0:
+            os.replace(tmp, exe)
+            _prune_build_cache(keep=exe)
+        else:
+            try:
+                os.remove(tmp)
+            except Exception:
+                pass
+        return exe, rc, out, err
+
     def show_output(self, rc: int, out: str, err: str, compile_phase: bool = False):
         # show the output in a pager-like view; wait for user to press a key
+        # Only one screenful is ever shown, so trim each stream to that before
+        # concatenating instead of building a copy of the whole capture.
+        if self.use_curses:
+            maxy, maxx = self.stdscr.getmaxyx()
+            cap = max((maxy-3)*(maxx-1), 0)
+        else:
+            cap = _DUMB_OUTPUT_CAP
+        out = _truncate(out, cap)
+        err = _truncate(err, cap)
         sep = '--- stdout ---\n' + out + '\n--- stderr ---\n' + err + f'\n(returncode={rc})\n'
         self.popup_text(sep)
 
@@ -392,14 +1105,22 @@ class RawIDE:
         assert mode in ('command', 'editor')
         self.mode = mode
         # persistent mode indicator in status (no timeout)
-        self.status = f'MODE: {self.mode.upper()}'
+        self._set_status(self._mode_str())
         # do not set message_time so it remains visible
 
     # ---- UI helpers ----
+    def _mode_str(self) -> str:
+        return self._MODE_CMD if self.mode == 'command' else self._MODE_EDIT
+
+    def _set_status(self, status: str):
+        if status != self.status:
+            self.status = status
+            self._needs_draw = True
+
     def status_message(self, msg: str, timeout: float = 3.0):
         # If a mode is set, show it alongside the transient message
-        self.status = f'MODE: {self.mode.upper()} - {msg}'
-        self.message_time = time.time() + timeout
+        self._set_status(f'{self._mode_str()} - {msg}')
+        self.message_time = time.monotonic() + timeout
 
     def popup_text(self, text: str):
         # show text and wait for keypress
@@ -412,11 +1133,15 @@ class RawIDE:
             win.addstr(maxy-3, 1, 'Press any key to continue...')
             win.refresh()
             self.stdscr.getch()
+            # the popup covered the editor window; repaint all of it next draw
+            self._full_redraw = True
+            self._needs_draw = True
         else:
-            dt = DumbTerminal()
+            dt = self._dt
             dt.clear()
-            print(text)
-            input('Press Enter to continue...')
+            dt.write(text + '\n')
+            dt.read_line('Press Enter to continue...')
+            self._needs_draw = True
 
     # ---- Command handling ----
     def handle_command(self, cmdline: str) -> bool:
@@ -427,115 +1152,155 @@ class RawIDE:
             return True
         parts = cmd.split()
         main = parts[0]
-        args = parts[1:]
-        if main == 'w':
-            if args:
-                self.save_file(args[0])
-            else:
-                if not self.buffer.filename:
-                    self.status_message('Specify filename: :w filename')
-                else:
-                    self.save_file()
+        handler = self._cmds.get(main)
+        if handler is None:
+            self.status_message(f'Unknown command: {main}')
             return True
-        elif main == 'wq':
+        return handler(parts[1:])
+
+    def _cmd_w(self, args: List[str]) -> bool:
+        if args:
+            self.save_file(args[0])
+        else:
             if not self.buffer.filename:
-                self.status_message('Specify filename: :wq filename')
-                return True
-            self.save_file()
-            return False
-        elif main == 'q':
-            # support :q! to force quit
-            if args and args[0] == '!':
-                return False
-            if self.buffer.changed:
-                self.status_message('Unsaved changes. Use :q! to quit without saving.')
-                return True
-            return False
-        elif main == 'r':
-            self.compile_and_run()
-            return True
-        elif main == 'open':
-            if not args:
-                self.status_message('Usage: :open filename')
-            else:
-                self.open_file(args[0])
-            return True
-        elif main == 'cd':
-            if not args:
-                self.status_message('Usage: :cd directory')
+                self.status_message('Specify filename: :w filename')
             else:
-                try:
-                    os.chdir(args[0])
-                    self.status_message(f'cwd: {os.getcwd()}')
-                except Exception as e:
-                    self.status_message(f'cd error: {e}')
+                self.save_file()
+        return True
+
+    def _cmd_wq(self, args: List[str]) -> bool:
+        if not self.buffer.filename:
+            self.status_message('Specify filename: :wq filename')
             return True
-        elif main == 'mkdir':
-            if not args:
-                self.status_message('Usage: :mkdir dirname')
-            else:
-                try:
-                    os.makedirs(args[0], exist_ok=True)
-                    self.status_message('mkdir ok')
-                except Exception as e:
-                    self.status_message(f'mkdir error: {e}')
+        self.save_file()
+        return False
+
+    def _cmd_q(self, args: List[str]) -> bool:
+        # support :q! to force quit
+        if args and args[0] == '!':
+            return False
+        if self.buffer.changed:
+            self.status_message('Unsaved changes. Use :q! to quit without saving.')
             return True
-        elif main == 'ls':
-            target = args[0] if args else '.'
+        return False
+
+    def _cmd_r(self, args: List[str]) -> bool:
+        self.compile_and_run()
+        return True
+
+    def _cmd_open(self, args: List[str]) -> bool:
+        if not args:
+            self.status_message('Usage: :open filename')
+        else:
+            self.open_file(args[0])
+        return True
+
+    def _cmd_cd(self, args: List[str]) -> bool:
+        if not args:
+            self.status_message('Usage: :cd directory')
+        else:
             try:
-                items = os.listdir(target)
-                out = '\n'.join(items)
-                self.popup_text(out)
+                os.chdir(args[0])
+                self.status_message(f'cwd: {os.getcwd()}')
             except Exception as e:
-                self.status_message(f'ls error: {e}')
-            return True
-        elif main == 'help':
-            help_text = (
-                ':w - save\n'
-                ':wq - save and quit\n'
-                ':q - quit (:q! to force)\n'
-                ':r - compile & run current file\n'
-                ':open filename - open file\n'
-                ':cd dir - change directory\n'
-                ':mkdir dir - create directory\n'
-                ':ls [dir] - list directory\n'
-                'Ctrl+Z - undo\n'
-                'Ctrl+U - redo\n'
-            )
-            self.popup_text(help_text)
-            return True
+                self.status_message(f'cd error: {e}')
+        return True
+
+    def _cmd_mkdir(self, args: List[str]) -> bool:
+        if not args:
+            self.status_message('Usage: :mkdir dirname')
         else:
-            self.status_message(f'Unknown command: {main}')
-            return True
+            try:
+                os.makedirs(args[0], exist_ok=True)
+                self.status_message('mkdir ok')
+            except Exception as e:
+                self.status_message(f'mkdir error: {e}')
+        return True
+
+    def _cmd_ls(self, args: List[str]) -> bool:
+        target = args[0] if args else '.'
+        try:
+            items = os.listdir(target)
+            out = '\n'.join(items)
+            self.popup_text(out)
+        except Exception as e:
+            self.status_message(f'ls error: {e}')
+        return True
+
+    def _cmd_help(self, args: List[str]) -> bool:
+        help_text = (
+            ':w - save\n'
+            ':wq - save and quit\n'
+            ':q - quit (:q! to force)\n'
+            ':r - compile & run current file\n'
+            ':open filename - open file\n'
+            ':cd dir - change directory\n'
+            ':mkdir dir - create directory\n'
+            ':ls [dir] - list directory\n'
+            'Ctrl+Z - undo\n'
+            'Ctrl+U - redo\n'
+        )
+        self.popup_text(help_text)
+        return True
 
     # ---- Drawing / input loops ----
+    def _status_line(self) -> str:
+        """Return the status bar text, re-formatting it only when its inputs changed."""
+        key = (self.buffer.filename, self.buffer.changed, self.buffer.cy, self.buffer.cx, self.status)
+        if key != self._status_key:
+            self._status_key = key
+            self._status_text = f"rawIDE - {self.buffer.filename or '[no file]'} {'*' if self.buffer.changed else ''}  ln {self.buffer.cy+1}, col {self.buffer.cx+1}  {self.status}"
+        return self._status_text
+
+    def _should_draw(self) -> bool:
+        return (self._needs_draw or self.buffer.has_dirty()
+                or (self.buffer.cx, self.buffer.cy) != self._drawn_cursor)
+
     def draw(self):
+        self._needs_draw = False
+        self._drawn_cursor = (self.buffer.cx, self.buffer.cy)
         if self.use_curses:
-            self.stdscr.erase()
             maxy, maxx = self.stdscr.getmaxyx()
             self.height = maxy
             self.width = maxx
             # Draw text area (leave last line for status)
             text_h = maxy - 2
-            for i in range(text_h):
-                lineno = self.top_line + i
-                if lineno >= len(self.buffer.lines):
-                    break
-                line = self.buffer.lines[lineno]
-                # handle left_col scrolling
-                visible = line[self.left_col:self.left_col+maxx-1]
+            # Scrolling, resizing or a popup invalidates every visible line;
+            # otherwise only lines touched by edits are repainted.
+            view = (self.top_line, self.left_col, maxy, maxx)
+            if self._full_redraw or view != self._drawn_view:
+                self.stdscr.touchwin()
+                self.buffer.mark_dirty_from(0)
+                self._drawn_view = view
+                self._full_redraw = False
+            stdscr = self.stdscr
+            buf = self.buffer
+            nlines = len(buf.lines)
+            top = self.top_line
+            lc = self.left_col
+            wmax = maxx - 1
+            for lineno in buf.take_dirty(top, top + text_h):
+                i = lineno - top
                 try:
-                    self.stdscr.addstr(i, 0, visible)
+                    stdscr.move(i, 0)
+                    stdscr.clrtoeol()
+                    if lineno < nlines:
+                        # handle left_col scrolling
+                        stdscr.addstr(i, 0, buf.visible_slice(lineno, lc, wmax))
                 except curses.error:
                     pass
             # status bar
-            status = f"rawIDE - {self.buffer.filename or '[no file]'} {'*' if self.buffer.changed else ''}  ln {self.buffer.cy+1}, col {self.buffer.cx+1}  {self.status}"
+            status = self._status_line()
             try:
+                self.stdscr.move(maxy-2, 0)
+                self.stdscr.clrtoeol()
                 self.stdscr.addstr(maxy-2, 0, status[:maxx-1], curses.A_REVERSE)
             except curses.error:
                 pass
             # command line area
             try:
+                self.stdscr.move(maxy-1, 0)
+                self.stdscr.clrtoeol()
                 self.stdscr.addstr(maxy-1, 0, ':')
             except curses.error:
                 pass
@@ -547,24 +1312,37 @@ class RawIDE:
                     self.stdscr.move(cy, cx)
                 except curses.error:
                     pass
-            self.stdscr.refresh()
+            # stage the window and push only the changed cells in one update
+            self.stdscr.noutrefresh()
+            curses.doupdate()
         else:
-            dt = DumbTerminal()
+            dt = self._dt
             dt.clear()
             cols, rows = dt.cols, dt.rows
             text_h = rows - 2
+            # every line is repainted below; just reset the dirty tracking
+            self.buffer.take_dirty(0, 0)
+            # assemble the whole frame and hand it to the terminal in one write
+            parts = []
+            append = parts.append
+            buf = self.buffer
+            nlines = len(buf.lines)
+            top = self.top_line
+            lc = self.left_col
+            wmax = cols - 1
             for i in range(text_h):
-                lineno = self.top_line + i
-                if lineno >= len(self.buffer.lines):
-                    print('')
+                lineno = top + i
+                if lineno >= nlines:
+                    append('\n')
                     continue
-                line = self.buffer.lines[lineno]
-                visible = line[self.left_col:self.left_col+cols-1]
-                print(visible)
+                append(buf.visible_slice(lineno, lc, wmax))
+                append('\n')
             # status bar
-            status = f"rawIDE - {self.buffer.filename or '[no file]'} {'*' if self.buffer.changed else ''}  ln {self.buffer.cy+1}, col {self.buffer.cx+1}  {self.status}"
-            print(status[:cols-1])
-            print(':', end='', flush=True)
+            status = self._status_line()
+            parts.append(status[:cols-1])
+            parts.append('\n:')
+            dt.write(''.join(parts))
+            dt.flush()
 
     def ensure_cursor_visible(self):
         # vertical
@@ -582,6 +1360,12 @@ class RawIDE:
         curses.raw()
         curses.noecho()
         self.stdscr.keypad(True)
+        # cursor visibility is set once here rather than on every frame
+        self.stdscr.leaveok(False)
+        try:
+            curses.curs_set(1)
+        except curses.error:
+            pass
         # ensure mode indicator shown
         self.set_mode(self.mode)
         try:
@@ -590,8 +1374,12 @@ class RawIDE:
             self.width = maxx
             while True:
                 self.ensure_cursor_visible()
-                self.draw()
+                if self._should_draw():
+                    self.draw()
                 ch = self.stdscr.getch()
+                if ch == curses.KEY_RESIZE:
+                    self._needs_draw = True
+                    continue
                 # Mode switching: ESC -> command (normal), 'i' in command -> editor (insert)
                 if ch == 27:  # ESC
                     self.set_mode('command')
@@ -634,6 +1422,8 @@ class RawIDE:
                         self.stdscr.addstr(maxy-1, 0, ':')
                         cmd = self.stdscr.getstr(maxy-1, 1, 200).decode('utf-8')
                         curses.noecho()
+                        # the typed command is still echoed on the command line
+                        self._needs_draw = True
                         cont = self.handle_command(cmd)
                         if not cont:
                             break
@@ -662,26 +1452,44 @@ class RawIDE:
                                 self.buffer.insert_char('    ')
                             else:
                                 self.buffer.insert_char(chs)
-                # clear transient status when expired
-                if time.time() > self.message_time:
+                # clear transient status when expired (only if one is shown)
+                if self.message_time and time.monotonic() > self.message_time:
                     # keep the persistent mode indicator
-                    self.status = f'MODE: {self.mode.upper()}'
+                    self._set_status(self._mode_str())
+                    self.message_time = 0.0
         finally:
             curses.nocbreak()
             self.stdscr.keypad(False)
             curses.echo()
 
+    def _dt_resize(self):
+        self._dt.resize()
+        self._needs_draw = True
+
     def run_dumb(self):
-        dt = DumbTerminal()
+        if self._dt is None:
+            self._dt = DumbTerminal()
+        dt = self._dt
+        dt.enter_raw()
         dt.hide_cursor()
         # ensure mode indicator shown
         self.set_mode(self.mode)
+        # refresh the terminal size when it changes, not on every frame
+        has_winch = hasattr(signal, 'SIGWINCH')
+        if has_winch:
+            old_winch = signal.signal(signal.SIGWINCH, lambda *_: self._dt_resize())
+        keys = 0
         try:
             while True:
+                if not has_winch:
+                    keys += 1
+                    if keys % _RESIZE_POLL_KEYS == 0:
+                        self._dt_resize()
                 self.height = dt.rows
                 self.width = dt.cols
                 self.ensure_cursor_visible()
-                self.draw()
+                if self._should_draw():
+                    self.draw()
                 key = dt.get_key()
                 ktype, val = key
                 # handle ESC
@@ -721,8 +1529,9 @@ class RawIDE:
                             # read command from stdin (command mode only)
                             dt.move_cursor(0, dt.rows-1)
                             dt.show_cursor()
-                            cmd = input(':')
+                            cmd = dt.read_line(':')
                             dt.hide_cursor()
+                            self._needs_draw = True
                             cont = self.handle_command(cmd)
                             if not cont:
                                 break
@@ -748,10 +1557,15 @@ class RawIDE:
                             else:
                                 # insert literal character (including ':') in editor mode
                                 self.buffer.insert_char(val)
-                if time.time() > self.message_time:
-                    self.status = f'MODE: {self.mode.upper()}'
+                if self.message_time and time.monotonic() > self.message_time:
+                    self._set_status(self._mode_str())
+                    self.message_time = 0.0
         finally:
+            if has_winch:
+                signal.signal(signal.SIGWINCH, old_winch or signal.SIG_DFL)
             dt.show_cursor()
+            dt.flush()
+            dt.restore()
 
     def run(self):
         if self.use_curses and self.stdscr is not None: